@@ -1,68 +1,195 @@
 """The main laser dispersion scan GUI."""
 
 import argparse
+import functools
+import io
 import logging
+import os
+import shutil
 import signal
+import socket
 import sys
-from typing import List, Optional
+from typing import Callable, Optional, Sequence, Tuple
 
-import matplotlib
-import matplotlib.pyplot as plt
-import typhos
-from pydm.exception import install as install_exception_handler
-from qtpy import QtWidgets
-
-from .. import utils
-from ..loader import Loader
-from ..widgets import DscanMain
+from qtpy import QtCore, QtWidgets
 
 DESCRIPTION = __doc__
 logger = logging.getLogger(__name__)
 
+#: Characters which indicate a script was specified as a path.
+_PATH_SEPARATORS = frozenset("/\\")
+_sigint_received = False
+_ophyd_configured = False
+_exception_handler_installed = False
+#: The (path, mtime) keys and resulting stylesheet last applied to the app.
+_applied_stylesheet: Optional[Tuple[Tuple[Tuple[str, float], ...], str]] = None
+
 
 def _sigint_handler(signal, frame):
+    global _sigint_received
     logger.info("Caught Ctrl-C (SIGINT); exiting.")
-    sys.exit(1)
+    _sigint_received = True
+
+
+def _install_sigint_handler(app: QtWidgets.QApplication) -> Callable[[], None]:
+    """
+    Quit the Qt event loop as soon as SIGINT arrives.
+
+    Python signal handlers only run once control returns to the interpreter,
+    which may not happen until some unrelated Qt event fires.  Having the
+    signal wakeup file descriptor watched by Qt avoids that delay.  The
+    handler and the notifier are installed together, as the handler alone
+    would only set a flag that nothing checks.
+
+    Parameters
+    ----------
+    app : QtWidgets.QApplication
+        The application to quit upon SIGINT.
+
+    Returns
+    -------
+    callable
+        A function which removes the notifier, closes its sockets, and
+        restores the previous SIGINT handler and wakeup file descriptor.
+    """
+    # Raises ValueError outside of the main thread, before anything needs
+    # to be cleaned up
+    previous_handler = signal.signal(signal.SIGINT, _sigint_handler)
+
+    rsock, wsock = socket.socketpair()
+    rsock.setblocking(False)
+    wsock.setblocking(False)
+    previous_wakeup_fd = signal.set_wakeup_fd(wsock.fileno())
+
+    def wakeup():
+        try:
+            rsock.recv(4096)
+        except OSError:
+            ...
+        if _sigint_received:
+            app.quit()
+
+    notifier = QtCore.QSocketNotifier(rsock.fileno(), QtCore.QSocketNotifier.Read, app)
+    notifier.activated.connect(wakeup)
+
+    def remove():
+        signal.set_wakeup_fd(previous_wakeup_fd)
+        notifier.setEnabled(False)
+        notifier.deleteLater()
+        rsock.close()
+        wsock.close()
+        if previous_handler is not None:
+            signal.signal(signal.SIGINT, previous_handler)
+
+    return remove
+
+
+@functools.lru_cache(maxsize=4)
+def _load_qss(keys: Tuple[Tuple[str, float], ...]) -> str:
+    """
+    Load the stylesheets identified by ``(path, mtime)`` keys.
 
+    ``mtime`` is only used as part of the cache key, such that modified
+    files are re-read.
+    """
+    # Copy the raw file contents into one buffer and decode them in one pass.
+    buf = io.BytesIO()
+    for idx, (path, _) in enumerate(keys):
+        if idx > 0:
+            buf.write(b"\n\n")
+        with open(path, "rb") as fp:
+            shutil.copyfileobj(fp, buf)
+    return buf.getvalue().decode("utf-8")
+
+
+@functools.lru_cache(maxsize=1)
+def _packaged_stylesheet() -> Optional[str]:
+    """
+    The packaged stylesheets, merged at build time (see setup.py).
 
-def _configure_stylesheet(paths: Optional[List[str]] = None) -> str:
+    Returns None in a development checkout, where the generated module does
+    not exist.
+    """
+    try:
+        from ..ui._stylesheet_data import STYLESHEET
+    except ImportError:
+        return None
+    return STYLESHEET
+
+
+@functools.lru_cache(maxsize=1)
+def _default_qss_paths() -> Tuple[str, ...]:
+    """The resolved paths of the stylesheets packaged in las-dispersion-scan."""
+    from .. import utils
+
+    return tuple(
+        str((utils.SOURCE_PATH / "ui" / name).resolve())
+        for name in ("stylesheet.qss", "pydm.qss")
+    )
+
+
+def _configure_stylesheet(
+    paths: Optional[Sequence[str]] = None,
+    app: Optional[QtWidgets.QApplication] = None,
+) -> str:
     """
     Configure stylesheets for the d-scan GUI.
 
     Parameters
     ----------
-    paths : List[str], optional
+    paths : Sequence[str], optional
         A list of paths to stylesheets to load.
         Defaults to those packaged in las-dispersion-scan.
+    app : QtWidgets.QApplication, optional
+        The application to configure.  Defaults to the current instance.
 
     Returns
     -------
     str
         The full stylesheet.
     """
-    app = QtWidgets.QApplication.instance()
-    typhos.use_stylesheet()
+    global _applied_stylesheet
 
-    if paths is None:
-        paths = [
-            str(utils.SOURCE_PATH / "ui" / "stylesheet.qss"),
-            str(utils.SOURCE_PATH / "ui" / "pydm.qss"),
-        ]
+    if app is None:
+        app = QtWidgets.QApplication.instance()
 
-    stylesheets = [app.styleSheet()]
+    loaded_stylesheet = _packaged_stylesheet() if paths is None else None
+    if loaded_stylesheet is not None:
+        keys = ()
+    else:
+        if paths is None:
+            paths = _default_qss_paths()
+        keys = tuple((path, os.path.getmtime(path)) for path in paths)
+        loaded_stylesheet = _load_qss(keys)
 
-    for path in paths:
-        with open(path, "rt") as fp:
-            stylesheets.append(fp.read())
+    current = app.styleSheet()
+    if _applied_stylesheet == (keys, current):
+        # Our stylesheet is still in effect and the files are unchanged.
+        # Re-applying it would only re-polish every widget.
+        return current
 
-    full_stylesheet = "\n\n".join(stylesheets)
+    import typhos
 
-    app.setStyleSheet(full_stylesheet)
+    typhos.use_stylesheet()
+    current = app.styleSheet()
+    # The base stylesheet is typically empty on the first call; skip it then.
+    if current:
+        full_stylesheet = "\n\n".join((current, loaded_stylesheet))
+    else:
+        full_stylesheet = loaded_stylesheet
+
+    if full_stylesheet != current:
+        app.setStyleSheet(full_stylesheet)
+    _applied_stylesheet = (keys, full_stylesheet)
     return full_stylesheet
 
 
 def configure_ophyd():
-    """Configure ophyd defaults."""
+    """Configure ophyd defaults.  Only the first call has an effect."""
+    global _ophyd_configured
+    if _ophyd_configured:
+        return
+
     from ophyd.signal import EpicsSignalBase
 
     EpicsSignalBase.set_defaults(
@@ -70,11 +197,36 @@ def configure_ophyd():
         connection_timeout=10.0,
         auto_monitor=True,
     )
+    _ophyd_configured = True
+
+
+def _install_exception_handler():
+    """Install the PyDM exception handler.  Only the first call has an effect."""
+    global _exception_handler_installed
+    if _exception_handler_installed:
+        return
+
+    from pydm.exception import install
+
+    install()
+    _exception_handler_installed = True
+
+
+@functools.lru_cache(maxsize=1)
+def _cached_parser() -> argparse.ArgumentParser:
+    """The stand-alone argument parser, built only once."""
+    return build_arg_parser(argparse.ArgumentParser())
+
+
+@functools.lru_cache(maxsize=1)
+def get_args() -> argparse.Namespace:
+    """Parse (and cache) the command-line arguments for the stand-alone GUI."""
+    return _cached_parser().parse_args()
 
 
 def build_arg_parser(argparser=None):
     if argparser is None:
-        argparser = argparse.ArgumentParser()
+        return _cached_parser()
 
     argparser.description = DESCRIPTION
     argparser.formatter_class = argparse.RawTextHelpFormatter
@@ -163,30 +315,43 @@ def main(
     data_path : str, optional
         File to load when the GUI opens.
     """
+    global _sigint_received
+    # Reset from any previous call in this process
+    _sigint_received = False
 
-    if script is not None and ("/" in script or "\\" in script):
+    if script is not None and not _PATH_SEPARATORS.isdisjoint(script):
         raise ValueError(
             f"Script is expected to be a Python module name, not a path: " f"{script!r}"
         )
 
-    signal.signal(signal.SIGINT, _sigint_handler)
+    # These are deferred such that building the argument parser (i.e.,
+    # ``--help``) does not require importing the full GUI stack.
+    import matplotlib
+
+    # Select the backend before pyplot is imported (by the widgets),
+    # so that matplotlib does not resolve and then switch backends.
+    try:
+        matplotlib.use("Qt5Agg")
+    except Exception:
+        logger.warning("Unable to select the qt5 backend for matplotlib", exc_info=True)
+
+    from ..loader import Loader
+    from ..widgets import DscanMain
+
     app = QtWidgets.QApplication.instance()
     if app is None:
         app = QtWidgets.QApplication([])
 
-    install_exception_handler()
+    _install_exception_handler()
     configure_ophyd()
 
     try:
-        _configure_stylesheet(paths=[stylesheet] if stylesheet else None)
+        _configure_stylesheet(paths=[stylesheet] if stylesheet else None, app=app)
     except Exception:
         logger.exception("Failed to load stylesheet; things may look odd...")
 
-    try:
-        matplotlib.use("Qt5Agg")
-    except Exception:
-        logger.warning("Unable to select the qt5 backend for matplotlib", exc_info=True)
-    plt.ion()
+    # Equivalent to pyplot.ion(), without requiring pyplot here
+    matplotlib.interactive(True)
 
     app.setOrganizationName("SLAC National Accelerator Laboratory")
     app.setApplicationName("las-dispersion-scan")
@@ -208,8 +373,18 @@ def main(
     except Exception:
         logger.exception("Failed to load user interface")
         raise
-    app.exec_()
+
+    # Only handle SIGINT ourselves for the duration of the event loop, such
+    # that Ctrl-C during the above setup still raises KeyboardInterrupt.
+    remove_sigint_handler = _install_sigint_handler(app)
+    try:
+        app.exec_()
+    finally:
+        remove_sigint_handler()
+
+    if _sigint_received:
+        sys.exit(1)
 
 
 if __name__ == "__main__":
-    main()
+    main(**vars(get_args()))
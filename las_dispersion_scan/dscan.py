@@ -7,6 +7,7 @@ import pathlib
 import time
 from collections import deque
 from typing import (
+    TYPE_CHECKING,
     Any,
     Dict,
     Generator,
@@ -20,18 +21,25 @@ from typing import (
     cast,
 )
 
-import matplotlib.pyplot as plt
 import numpy as np
 import pypret
 import pypret.frequencies
-import scipy.interpolate
-from matplotlib.ticker import EngFormatter
 from scipy.ndimage import gaussian_filter
 
 from . import devices, motion, plotting
 from .options import Material, NonlinearProcess, PulseAnalysisMethod, RetrieverSolver
 from .plotting import RetrievalResultPlot
-from .utils import RetrievalResultStandin, get_pulse_spectrum, preprocess
+from .utils import (
+    RetrievalResultStandin,
+    get_fwhm_from_spectra,
+    get_pulse_spectrum,
+    interpolate_zero_fill,
+    preprocess,
+    roll_peaks_to,
+)
+
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
 
 logger = logging.getLogger(__name__)
 
@@ -68,13 +76,36 @@ def get_fundamental_spectrum(
     """
     assert wavelengths.shape == intensities.shape
 
-    wavelength_fund = wavelengths[
-        (wavelengths > range_low) & (wavelengths < range_high)
-    ]
-    intensities_fund = intensities[
-        (wavelengths > range_low) & (wavelengths < range_high)
-    ]
-    return np.column_stack((wavelength_fund, intensities_fund))
+    idx = (wavelengths > range_low) & (wavelengths < range_high)
+    return np.column_stack((wavelengths[idx], intensities[idx]))
+
+
+def linear_fit(x: np.ndarray, y: np.ndarray) -> Tuple[Any, Any]:
+    """
+    Closed-form linear least-squares fit of ``y`` against ``x``.
+
+    This is equivalent to ``np.polyfit(x, y, 1)``, without the Vandermonde
+    matrix and SVD.  A 2D ``y`` is fit row-by-row, all at once.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The 1D independent variable.
+    y : np.ndarray
+        The dependent variable, with the last axis matching ``x``.
+
+    Returns
+    -------
+    slope : float or np.ndarray
+        The slope, per row of ``y``.
+    intercept : float or np.ndarray
+        The intercept, per row of ``y``.
+    """
+    x_mean = x.mean()
+    x_centered = x - x_mean
+    slope = (y @ x_centered) / (x_centered @ x_centered)
+    intercept = y.mean(axis=-1) - slope * x_mean
+    return slope, intercept
 
 
 @dataclasses.dataclass
@@ -115,9 +146,8 @@ class SpectrumData:
     @property
     def raw_center(self) -> float:
         """Wavelength raw center."""
-        return sum(np.multiply(self.wavelengths, self.intensities)) / sum(
-            self.intensities
-        )
+        # Raises ZeroDivisionError if the intensities sum to zero
+        return float(np.average(self.wavelengths, weights=self.intensities))
         # wavelength_raw_center = self.wavelength_fund * 1E-9
 
     def truncate_wavelength(
@@ -128,7 +158,11 @@ class SpectrumData:
         return self.wavelengths[idx].copy(), self.intensities[idx].copy()
 
     @classmethod
-    def from_device(cls, device: devices.Spectrometer) -> SpectrumData:
+    def from_device(
+        cls,
+        device: devices.Spectrometer,
+        wavelengths: Optional[np.ndarray] = None,
+    ) -> SpectrumData:
         """
         Acquire spectra from the given device.
 
@@ -136,22 +170,27 @@ class SpectrumData:
         ----------
         device : Spectrometer
             Spectrometer device instance
+        wavelengths : np.ndarray, optional
+            Wavelengths (in meters) previously acquired from the device, if
+            known to be unchanged.  This avoids re-reading and trimming them.
 
         Returns
         -------
         SpectrumData
             The acquired data
         """
-        wavelengths = np.trim_zeros(
-            cast(Sequence[float], device.wavelengths.get()), "b"
-        )
+        if wavelengths is None:
+            raw_wavelengths = np.trim_zeros(
+                cast(Sequence[float], device.wavelengths.get()), "b"
+            )
+            wavelengths = convert_to_meters(
+                raw_wavelengths, getattr(device, "wavelength_units", "nm")
+            )
         intensities = np.array(
             cast(Sequence[float], device.spectrum.get())[: len(wavelengths)]
         )
         return cls(
-            wavelengths=convert_to_meters(
-                wavelengths, getattr(device, "wavelength_units", "nm")
-            ),
+            wavelengths=wavelengths,
             intensities=intensities,
         )
 
@@ -193,18 +232,19 @@ class SpectrumData:
         Returns
         -------
         np.ndarray
-            Background-subtracted wavelengths based on a 1D polyfit
+            Background-subtracted wavelengths based on a linear fit
             of wavelength/intensity background.
         np.ndarray
             Background-subtracted and normalized intensity.  Intensities under
             ``threshold`` are zeroed.
         """
         wavelength_bkg, intensities_bkg = self.get_background(count=count)
-        fit = np.polyfit(wavelength_bkg, intensities_bkg, 1)
-        wavelength_fit = self.wavelengths * fit[0] + fit[1]
+        slope, intercept = linear_fit(wavelength_bkg, intensities_bkg)
+        wavelength_fit = self.wavelengths * slope
+        wavelength_fit += intercept
         intensities = self.intensities - wavelength_fit
         intensities /= np.max(intensities)
-        intensities[intensities < threshold] = 0
+        np.putmask(intensities, intensities < threshold, 0.0)
         return wavelength_fit, intensities
 
     def plot(self, pulse: Optional[pypret.Pulse] = None):
@@ -223,6 +263,8 @@ class SpectrumData:
         matplotlib.pyplot.Axis
             The plot axis.
         """
+        import matplotlib.pyplot as plt
+
         fig, ax = plt.subplots()
         ax = cast(plt.Axes, ax)
         wavelength_bkg, intensities_bkg = self.get_background(count=15)
@@ -270,12 +312,16 @@ class ScanData:
         wavelength_bkg = np.hstack(
             (self.wavelengths[:count], self.wavelengths[-count:])
         )
-        for i in range(len(self.positions)):
-            intensities_bkg = np.hstack(
-                (self.intensities[i, :count], self.intensities[i, -count:])
-            )
-            fit = np.polyfit(wavelength_bkg, intensities_bkg, 1)
-            self.intensities[i, :] -= self.wavelengths * fit[0] + fit[1]
+        # Shape: (positions, 2 * count)
+        intensities_bkg = np.hstack(
+            (self.intensities[:, :count], self.intensities[:, -count:])
+        )
+        # Fit all positions at once
+        slope, intercept = linear_fit(wavelength_bkg, intensities_bkg)
+        # A single (positions, wavelengths) temporary for the background:
+        background = np.multiply.outer(slope, self.wavelengths)
+        background += intercept[:, np.newaxis]
+        self.intensities -= background
 
     def truncate_wavelength(
         self, range_low: float, range_high: float
@@ -284,6 +330,54 @@ class ScanData:
         idx = (self.wavelengths > range_low) & (self.wavelengths < range_high)
         return self.wavelengths[idx].copy(), self.intensities[:, idx].copy()
 
+    def blur_and_truncate_wavelength(
+        self,
+        sigma: float,
+        range_low: float,
+        range_high: float,
+        truncate: float = 4.0,
+    ) -> Tuple[np.ndarray, np.ndarray]:
+        """
+        Apply a Gaussian blur and truncate the wavelength to the given range.
+
+        This is equivalent to blurring all intensities prior to
+        ``truncate_wavelength``.  However, only the wavelengths in range - plus
+        the filter radius on either side - are actually blurred.
+
+        Parameters
+        ----------
+        sigma : float
+            Standard deviation of the Gaussian kernel, applied on both axes.
+        range_low : float
+            Wavelength lower limit.
+        range_high : float
+            Wavelength upper limit.
+        truncate : float, optional
+            Truncate the filter at this many standard deviations, as in
+            ``scipy.ndimage.gaussian_filter``.
+
+        Returns
+        -------
+        np.ndarray
+            Truncated wavelengths.
+        np.ndarray
+            Blurred and truncated intensities.
+        """
+        idx = (self.wavelengths > range_low) & (self.wavelengths < range_high)
+        (in_range,) = np.nonzero(idx)
+        if not sigma or not len(in_range):
+            # No blur (the default), or nothing to blur
+            return self.wavelengths[idx].copy(), self.intensities[:, idx].copy()
+
+        # The radius used by scipy.ndimage.gaussian_filter:
+        radius = int(truncate * sigma + 0.5)
+        start = max(in_range[0] - radius, 0)
+        stop = min(in_range[-1] + radius + 1, len(self.wavelengths))
+        blurred = gaussian_filter(
+            self.intensities[:, start:stop], sigma=sigma, truncate=truncate
+        )
+        return self.wavelengths[idx].copy(), blurred[:, idx[start:stop]]
+
     @classmethod
     def from_multiple_scans(
         cls,
@@ -365,25 +459,26 @@ class Acquisition:
             The data from the scan.
         """
         path = pathlib.Path(path)
-        loaded = np.load(path, allow_pickle=True)
-        try:
-            settings = loaded["settings"][()]
-        except Exception:
-            settings = {}
-            logger.exception("Failed to unpickle settings from the file")
-
-        return cls(
-            fundamental=SpectrumData(
-                wavelengths=loaded["fund_wavelengths"],
-                intensities=loaded["fund_intensities"],
-            ),
-            scan=ScanData(
-                positions=loaded["positions"],
-                wavelengths=loaded["wavelengths"],
-                intensities=loaded["intensities"],
-            ),
-            settings=settings,
-        )
+        # Release the npz file handle once the arrays have been read.
+        with np.load(path, allow_pickle=True) as loaded:
+            try:
+                settings = loaded["settings"][()]
+            except Exception:
+                settings = {}
+                logger.exception("Failed to unpickle settings from the file")
+
+            return cls(
+                fundamental=SpectrumData(
+                    wavelengths=loaded["fund_wavelengths"],
+                    intensities=loaded["fund_intensities"],
+                ),
+                scan=ScanData(
+                    positions=loaded["positions"],
+                    wavelengths=loaded["wavelengths"],
+                    intensities=loaded["intensities"],
+                ),
+                settings=settings,
+            )
 
     def save(self, path: Union[pathlib.Path, str], format: str = "npz") -> None:
         """
@@ -572,6 +667,8 @@ class AcquisitionScan:
             )
 
             spectra = [data.spectrum]
+            # The wavelengths are fixed for the additional spectra at this point
+            point_wavelengths = np.asarray(data.wavelengths)
 
             # Wait for a single dwell period for the motor to settle into its
             # final position. (TODO: separate parameter?)
@@ -579,7 +676,7 @@ class AcquisitionScan:
 
             while not self._stop and len(spectra) < per_step_spectra:
                 spectrum = SpectrumData.from_device(
-                    self.spectrometer
+                    self.spectrometer, wavelengths=point_wavelengths
                 ).intensities.tolist()
 
                 if spectrum == spectra[-1]:
@@ -588,9 +685,10 @@ class AcquisitionScan:
 
                 spectra.append(spectrum)
 
-            data.spectrum = np.average(np.asarray(spectra), axis=0).tolist()
+            average_spectrum = np.average(np.asarray(spectra), axis=0)
+            data.spectrum = average_spectrum.tolist()
 
-            if abs(np.sum(data.spectrum)) < 1e-6:
+            if abs(np.sum(average_spectrum)) < 1e-6:
                 logger.warning(
                     "Retrying scan point %d (%g); spectra was all zero",
                     idx,
@@ -681,9 +779,11 @@ class PypretResult:
     trace_raw: Optional[pypret.MeshData] = None
     #: The pre-processed mesh data.
     trace: Optional[pypret.MeshData] = None
-    #: The per-parameter full-width half-max (FWHM).
+    #: The per-parameter PNPS spectral masks, one row per retrieval parameter.
+    masks: np.ndarray = dataclasses.field(default_factory=_default_ndarray)
+    #: The per-parameter full-width half-max (FWHM), shape (parameters,).
     fwhm: np.ndarray = dataclasses.field(default_factory=_default_ndarray)
-    #: The per-parameter resulting profile.
+    #: The per-parameter resulting profile, shape (parameters, time).
     result_profile: np.ndarray = dataclasses.field(default_factory=_default_ndarray)
     #: The fourier transform limit (FTL) of the pulse.
     fourier_transform_limit: float = 0.0
@@ -755,6 +855,8 @@ class PypretResult:
         -------
         pypret.MeshDataPlot
         """
+        import matplotlib.pyplot as plt
+
         if data is None:
             data = self._get_mesh_data()
 
@@ -782,6 +884,8 @@ class PypretResult:
         -------
         pypret.MeshDataPlot
         """
+        import matplotlib.pyplot as plt
+
         factor = 2 * np.pi * 2.99792 * 1e17
         md = pypret.MeshDataPlot(self.trace, show=False)
         ax = cast(plt.Axes, md.ax)
@@ -801,9 +905,7 @@ class PypretResult:
 
     def _get_retrieval_pulse(self) -> pypret.Pulse:
         pulse = pypret.Pulse(self.retrieval.pnps.ft, self.retrieval.pnps.w0, unit="om")
-        pulse.spectrum = self.retrieval.pulse_retrieved * self.retrieval.pnps.mask(
-            self._plot_param
-        )
+        pulse.spectrum = self.retrieval.pulse_retrieved * self._plot_mask
         return pulse
 
     def plot_time_domain_retrieval(
@@ -842,6 +944,9 @@ class PypretResult:
         plt.Axes
             The right axis.
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import EngFormatter
+
         assert self.plot is not None
         assert self.retrieval is not None
 
@@ -930,6 +1035,9 @@ class PypretResult:
         Tuple[plt.Figure, plt.Axes, plt.Axes]
 
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import EngFormatter
+
         assert self.plot is not None
         assert self.retrieval is not None
 
@@ -1026,6 +1134,9 @@ class PypretResult:
         plt.Figure
         plt.Axes
         """
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import EngFormatter
+
         assert self.plot is not None
         assert self.retrieval is not None
 
@@ -1091,39 +1202,42 @@ class PypretResult:
         )  # No factor of 2*pi
         return fig, ax
 
+    def _get_masks(self) -> np.ndarray:
+        """
+        Evaluate the PNPS spectral mask once per retrieval parameter.
+
+        Returns
+        -------
+        np.ndarray
+            The masks, one row per retrieval parameter.
+        """
+        return np.stack(
+            [self.retrieval.pnps.mask(param) for param in self.retrieval.parameter]
+        )
+
     def _calculate_fwhm_and_profile(self) -> Tuple[np.ndarray, np.ndarray]:
         """
         Calculates per-retrieval-parameter 'result_profile' and 'fwhm'.
 
-        Side-effect: modifies self.pulse.spectrum
-
         Returns
         -------
         np.ndarray
-            The FWHM array.
+            The FWHM array, one per retrieval parameter.
         np.ndarray
-            The result profile.
+            The result profile, one row per retrieval parameter.
         """
         pulse = self.pulse
         assert pulse is not None
-        result_parameter_mid_idx = np.floor(len(pulse.field) / 2) + 1
-        result_profile = np.zeros((len(pulse.field), len(self.retrieval.parameter)))
-        fwhm = np.zeros((len(self.retrieval.parameter), 1))
-        for idx, param in enumerate(self.retrieval.parameter):
-            # Updating the spectrum property -> field gets updated
-            pulse.spectrum = self.retrieval.pulse_retrieved * self.retrieval.pnps.mask(
-                param
-            )
-            profile = np.power(np.abs(pulse.field), 2)[:]
-            profile_max_idx = np.argmax(profile)
-            result_profile[:, idx] = np.roll(
-                profile, -round(profile_max_idx - result_parameter_mid_idx)
-            )
-            try:
-                fwhm[idx] = pulse.fwhm(dt=pulse.dt / 100)
-            except Exception:
-                fwhm[idx] = np.nan
+        spectra = self.retrieval.pulse_retrieved * self.masks
+        fwhm = get_fwhm_from_spectra(spectra, pulse.dt)
 
+        # The field for every spectrum in one transform (along the last axis),
+        # rather than setting ``pulse.spectrum`` for each
+        profiles = np.abs(pulse.ft.backward(spectra)) ** 2
+
+        # Align all peaks just after the center, in one gather
+        result_parameter_mid_idx = profiles.shape[-1] // 2 + 1
+        result_profile = roll_peaks_to(profiles, result_parameter_mid_idx)
         return fwhm, result_profile
 
     @property
@@ -1134,7 +1248,7 @@ class PypretResult:
     @property
     def optimum_fwhm(self) -> float:
         """Optimum full-width half-max (FWHM) value."""
-        return self.fwhm[self.optimum_fwhm_idx][0]
+        return self.fwhm[self.optimum_fwhm_idx]
 
     def plot_fwhm_vs_grating_position(self):
         """
@@ -1147,6 +1261,8 @@ class PypretResult:
         matplotlib.pyplot.Axis
             The plot axis.
         """
+        import matplotlib.pyplot as plt
+
         fig = plt.figure()
         ax = cast(plt.Axes, fig.add_subplot(111))
         ax.plot(self.scan.positions * 1e3, self.fwhm * 1e15)
@@ -1175,13 +1291,22 @@ class PypretResult:
         matplotlib.pyplot.Axis
             The plot axis.
         """
+        import matplotlib.pyplot as plt
+
         assert self.pulse is not None
+        time_limit = 8 * self.optimum_fwhm
+        # Only contour the visible time window (plus one sample either side),
+        # rather than the full time grid
+        t = self.pulse.t
+        start = max(int(np.searchsorted(t, -time_limit)) - 1, 0)
+        stop = int(np.searchsorted(t, time_limit, side="right")) + 1
+
         fig = plt.figure()
         ax = cast(plt.Axes, fig.add_subplot(111))
         fig = plt.contourf(
-            self.pulse.t * 1e15,
+            t[start:stop] * 1e15,
             self.scan.positions * 1e3,
-            self.result_profile.transpose(),
+            self.result_profile[:, start:stop],
             200,
             cmap="nipy_spectral",
         )
@@ -1189,28 +1314,48 @@ class PypretResult:
         ax.set_xlabel("Time (fs)")
         ax.set_ylabel("Position (mm)")
         ax.set_title("Dscan Temporal Profile")
-        ax.set_xlim(-8 * self.optimum_fwhm * 1e15, 8 * self.optimum_fwhm * 1e15)
+        ax.set_xlim(-time_limit * 1e15, time_limit * 1e15)
         return fig, ax
 
     def get_fund_intensities_bkg_sub(
-        self, use_pulse_spectral_intensity: bool = False
+        self,
+        use_pulse_spectral_intensity: bool = False,
+        result_spec: Optional[np.ndarray] = None,
     ) -> np.ndarray:
         """
         Fundamental intensities with background subtracted.
+
+        Parameters
+        ----------
+        use_pulse_spectral_intensity : bool, optional
+            Scale the intensities to best match the spectral intensity of
+            ``self.pulse``.
+        result_spec : np.ndarray, optional
+            The spectral intensity of ``self.pulse`` at the fundamental
+            wavelengths, if already calculated.  See ``_get_result_spectrum``.
         """
         assert self.pulse is not None
         _, intensities = self.fund.subtract_background()
         if not use_pulse_spectral_intensity:
             return intensities
 
-        result_spec = scipy.interpolate.interp1d(
-            self.pulse.wl,
-            self.pulse.spectral_intensity,
-            bounds_error=False,
-            fill_value=0.0,
-        )(self.fund.wavelengths)
+        if result_spec is None:
+            result_spec = self._get_result_spectrum()
         return intensities * pypret.lib.best_scale(intensities, result_spec)
 
+    def _get_result_spectrum(self) -> np.ndarray:
+        """
+        The spectral intensity of ``self.pulse`` at the fundamental wavelengths.
+
+        Returns
+        -------
+        np.ndarray
+        """
+        assert self.pulse is not None
+        return interpolate_zero_fill(
+            self.fund.wavelengths, self.pulse.wl, self.pulse.spectral_intensity
+        )
+
     def _get_rms_error(self) -> float:
         """
         RMS error of the final result, held in ``self.pulse``.
@@ -1220,14 +1365,11 @@ class PypretResult:
         float
         """
         assert self.pulse is not None
-        result_spec = scipy.interpolate.interp1d(
-            self.pulse.wl,
-            self.pulse.spectral_intensity,
-            bounds_error=False,
-            fill_value=0.0,
-        )(self.fund.wavelengths)
+        result_spec = self._get_result_spectrum()
         return pypret.lib.nrms(
-            self.get_fund_intensities_bkg_sub(use_pulse_spectral_intensity=True),
+            self.get_fund_intensities_bkg_sub(
+                use_pulse_spectral_intensity=True, result_spec=result_spec
+            ),
             result_spec,
         )
 
@@ -1287,14 +1429,26 @@ class PypretResult:
             maxiter=self.max_iter,
         )
 
+    @property
+    def _plot_param_idx(self) -> int:
+        """Index of the plot parameter for RetrievalResultPlot."""
+        if self.plot_position is None:
+            return int(self.optimum_fwhm_idx)
+        return int(
+            np.nanargmin(np.abs(self.scan.positions - self.plot_position * 1e-3))
+        )
+
     @property
     def _plot_param(self) -> float:
         """Plot parameter for RetrievalResultPlot."""
-        if self.plot_position is None:
-            return self.retrieval.parameter[self.optimum_fwhm_idx]
-        return self.retrieval.parameter[
-            (np.nanargmin(np.abs(self.scan.positions - self.plot_position * 1e-3)))
-        ]
+        return self.retrieval.parameter[self._plot_param_idx]
+
+    @property
+    def _plot_mask(self) -> np.ndarray:
+        """The PNPS spectral mask at the plot parameter."""
+        if len(self.masks) == len(self.retrieval.parameter):
+            return self.masks[self._plot_param_idx]
+        return self.retrieval.pnps.mask(self._plot_param)
 
     @property
     def _final_plot_position(self):
@@ -1315,6 +1469,7 @@ class PypretResult:
         return RetrievalResultPlot(
             retrieval_result=self.retrieval,
             retrieval_parameter=self._plot_param,
+            retrieval_mask=self._plot_mask,
             fund_range=self.spec_fund_range,
             scan_range=self.spec_scan_range,
             final_position=self._final_plot_position,
@@ -1458,15 +1613,13 @@ class PypretResult:
         logger.info(f"Time step = {ft.dt * 1e15:.2f} fs")
 
         self.pulse, self.fourier_transform_limit = self.fund._get_pulse(ft)
-        self.scan.intensities = gaussian_filter(
-            self.scan.intensities, sigma=self.blur_sigma
-        )
 
-        # Clean scan by truncating wavelength
+        # Blur and clean scan by truncating wavelength
         (
             self.scan.wavelengths,
             self.scan.intensities,
-        ) = self.scan.truncate_wavelength(
+        ) = self.scan.blur_and_truncate_wavelength(
+            sigma=self.blur_sigma,
             range_low=self.spec_scan_range[0] * 1e-9,
             range_high=self.spec_scan_range[1] * 1e-9,
         )
@@ -1478,6 +1631,7 @@ class PypretResult:
         self.rms_error = self._get_rms_error()
         logger.info(f"RMS spectrum error: {self.rms_error}")
 
+        self.masks = self._get_masks()
         self.fwhm, self.result_profile = self._calculate_fwhm_and_profile()
         self.plot = self._get_retrieval_plot()
 
@@ -1508,6 +1662,7 @@ class PypretResult:
         show : bool, optional
             Show the plots.
         """
+        import matplotlib.pyplot as plt
 
         self.fund.plot(self.pulse)
         self.plot_mesh_data()
@@ -1,4 +1,5 @@
 import enum
+import functools
 
 import numpy as np
 import pypret
@@ -38,6 +39,7 @@ class Material(str, enum.Enum):
     gratinga = "gratinga"
     gratingc = "gratingc"
 
+    @functools.lru_cache(maxsize=None)
     def get_coefficient(self, wedge_angle: float) -> float:
         """
         Calculate the material coefficient for pypret MeshData, provided the
@@ -64,12 +66,15 @@ class Material(str, enum.Enum):
     @property
     def pypret_material(self) -> pypret.material.BaseMaterial:
         """The pypret material."""
-        return {
-            Material.fs: pypret.material.FS,
-            Material.bk7: pypret.material.BK7,
-            Material.gratinga: pypret.material.gratinga,
-            Material.gratingc: pypret.material.gratingc,
-        }[self]
+        return _pypret_materials[self]
+
+
+_pypret_materials = {
+    Material.fs: pypret.material.FS,
+    Material.bk7: pypret.material.BK7,
+    Material.gratinga: pypret.material.gratinga,
+    Material.gratingc: pypret.material.gratingc,
+}
 
 
 class RetrieverSolver(str, enum.Enum):
@@ -1,17 +1,19 @@
+from __future__ import annotations
+
 import dataclasses
 import enum
-from typing import Optional, Tuple, cast
+from typing import TYPE_CHECKING, Optional, Tuple, cast
 
-import matplotlib.gridspec as gridspec
-import matplotlib.pyplot as plt
 import numpy as np
 import pypret
 import pypret.frequencies
 import pypret.graphics
-from matplotlib.ticker import EngFormatter
 
 from .utils import RetrievalResultStandin
 
+if TYPE_CHECKING:
+    import matplotlib.pyplot as plt
+
 
 class PlotTrace(str, enum.Enum):
     measured = "measured"
@@ -124,6 +126,8 @@ class RetrievalResultPlot:
     fourier_transform_limit: float
     fundamental: Optional[np.ndarray] = None
     fundamental_wavelength: Optional[np.ndarray] = None
+    #: The PNPS mask at ``retrieval_parameter``, if already evaluated.
+    retrieval_mask: Optional[np.ndarray] = None
 
     def plot(
         self,
@@ -135,6 +139,10 @@ class RetrievalResultPlot:
         phase_blanking_threshold: float = 1e-3,
         show: bool = False,
     ):
+        import matplotlib.gridspec as gridspec
+        import matplotlib.pyplot as plt
+        from matplotlib.ticker import EngFormatter
+
         xaxis = PlotXAxis(xaxis)
         yaxis = PlotYAxis(yaxis)
 
@@ -157,11 +165,13 @@ class RetrievalResultPlot:
         ax12 = cast(plt.Axes, ax1.twinx())
         ax22 = cast(plt.Axes, ax2.twinx())
 
+        mask = self.retrieval_mask
+        if mask is None:
+            mask = self.retrieval_result.pnps.mask(self.retrieval_parameter)
+
         # Plot in time domain
-        pulse.spectrum = (
-            self.retrieval_result.pulse_retrieved
-            * self.retrieval_result.pnps.mask(self.retrieval_parameter)
-        )  # the retrieved pulse
+        # the retrieved pulse
+        pulse.spectrum = self.retrieval_result.pulse_retrieved * mask
         if oversampling:
             t = np.linspace(pulse.t[0], pulse.t[-1], pulse.N * oversampling)
             field2 = pulse.field_at(t)
@@ -0,0 +1,64 @@
+import numpy as np
+import pytest
+from scipy.ndimage import gaussian_filter
+
+from ..dscan import ScanData, linear_fit
+
+
+def test_linear_fit_1d():
+    rng = np.random.default_rng(0)
+    x = np.linspace(400e-9, 600e-9, 30)
+    y = 3e6 * x + 12.0 + rng.normal(size=x.shape)
+    slope, intercept = linear_fit(x, y)
+    np.testing.assert_allclose((slope, intercept), np.polyfit(x, y, 1), rtol=1e-9)
+
+
+def test_linear_fit_2d():
+    rng = np.random.default_rng(1)
+    x = np.linspace(200e-9, 300e-9, 30)
+    y = rng.normal(size=(20, len(x))) + np.arange(20)[:, np.newaxis] * 1e7 * x
+    slope, intercept = linear_fit(x, y)
+    assert slope.shape == intercept.shape == (20,)
+    for row, row_slope, row_intercept in zip(y, slope, intercept):
+        np.testing.assert_allclose(
+            (row_slope, row_intercept), np.polyfit(x, row, 1), rtol=1e-9
+        )
+
+
+@pytest.fixture
+def scan() -> ScanData:
+    rng = np.random.default_rng(2)
+    wavelengths = np.linspace(150e-9, 350e-9, 400)
+    return ScanData(
+        positions=np.linspace(-1e-3, 1e-3, 12),
+        wavelengths=wavelengths,
+        intensities=rng.uniform(0.0, 1000.0, size=(12, len(wavelengths))),
+    )
+
+
+@pytest.mark.parametrize("sigma", [0, 0.5, 1, 2.5, 6])
+@pytest.mark.parametrize(
+    "range_low, range_high",
+    [
+        pytest.param(200e-9, 300e-9, id="inner"),
+        pytest.param(100e-9, 250e-9, id="low-edge"),
+        pytest.param(250e-9, 400e-9, id="high-edge"),
+        pytest.param(100e-9, 400e-9, id="all"),
+        pytest.param(400e-9, 500e-9, id="empty"),
+    ],
+)
+def test_blur_and_truncate_wavelength(
+    scan: ScanData, sigma: float, range_low: float, range_high: float
+):
+    expected_intensities = scan.intensities
+    if sigma:
+        expected_intensities = gaussian_filter(scan.intensities, sigma=sigma)
+    idx = (scan.wavelengths > range_low) & (scan.wavelengths < range_high)
+
+    wavelengths, intensities = scan.blur_and_truncate_wavelength(
+        sigma=sigma, range_low=range_low, range_high=range_high
+    )
+    np.testing.assert_array_equal(wavelengths, scan.wavelengths[idx])
+    np.testing.assert_allclose(
+        intensities, expected_intensities[:, idx], rtol=1e-12, atol=1e-9
+    )
@@ -0,0 +1,142 @@
+import numpy as np
+import pytest
+import scipy.interpolate
+
+from ..utils import get_fwhm_from_spectra, interpolate_zero_fill, roll_peaks_to
+
+
+def brute_force_fwhm(spectrum: np.ndarray, dt: float, oversampling: int = 100):
+    """
+    Reference FWHM: evaluate the band-limited field directly on a time grid
+    ``oversampling`` times finer than ``dt`` and interpolate the half-max
+    crossings around the peak.
+    """
+    num_freqs = len(spectrum)
+    num_samples = num_freqs * oversampling
+    t = np.arange(num_samples) * (dt / oversampling)
+    k = np.arange(num_freqs)
+    field = np.exp(2j * np.pi * np.outer(t, k) / (num_freqs * dt)) @ spectrum
+    intensity = np.abs(field) ** 2
+
+    # Center the peak such that the pulse does not wrap around
+    intensity = np.roll(intensity, num_samples // 2 - np.argmax(intensity))
+    peak = num_samples // 2
+    half_max = intensity[peak] / 2.0
+
+    left = peak
+    while intensity[left - 1] >= half_max:
+        left -= 1
+    right = peak
+    while intensity[right + 1] >= half_max:
+        right += 1
+
+    def crossing(idx0, idx1):
+        y0, y1 = intensity[idx0], intensity[idx1]
+        return idx0 + (half_max - y0) / (y1 - y0) * (idx1 - idx0)
+
+    return (crossing(right, right + 1) - crossing(left - 1, left)) * (dt / oversampling)
+
+
+def gaussian_spectrum(
+    num_freqs: int = 128,
+    width: float = 6.0,
+    center: float = 40.0,
+    chirp: float = 0.0,
+) -> np.ndarray:
+    k = np.arange(num_freqs)
+    envelope = np.exp(-(((k - center) / width) ** 2))
+    return envelope * np.exp(1j * chirp * (k - center) ** 2)
+
+
+@pytest.mark.parametrize("width", [2.0, 6.0, 15.0])
+@pytest.mark.parametrize("chirp", [0.0, 0.01, 0.05])
+def test_fwhm_matches_brute_force(width: float, chirp: float):
+    dt = 1e-15
+    spectrum = gaussian_spectrum(width=width, chirp=chirp)
+    expected = brute_force_fwhm(spectrum, dt)
+    (fwhm,) = get_fwhm_from_spectra(spectrum, dt)
+    np.testing.assert_allclose(fwhm, expected, rtol=1e-3)
+
+
+def test_fwhm_batched_matches_single():
+    dt = 2e-15
+    spectra = np.stack(
+        [gaussian_spectrum(chirp=chirp) for chirp in np.linspace(-0.05, 0.05, 7)]
+    )
+    fwhm = get_fwhm_from_spectra(spectra, dt)
+    assert fwhm.shape == (len(spectra),)
+    for spectrum, value in zip(spectra, fwhm):
+        np.testing.assert_allclose(value, get_fwhm_from_spectra(spectrum, dt)[0])
+
+
+@pytest.mark.parametrize("chunk_samples", [1, 128 * 8 * 2, 128 * 8 * 3])
+def test_fwhm_chunked_matches_single_pass(chunk_samples: int):
+    dt = 2e-15
+    spectra = np.stack(
+        [gaussian_spectrum(chirp=chirp) for chirp in np.linspace(-0.05, 0.05, 7)]
+    )
+    np.testing.assert_array_equal(
+        get_fwhm_from_spectra(spectra, dt, chunk_samples=chunk_samples),
+        get_fwhm_from_spectra(spectra, dt, chunk_samples=len(spectra) * 128 * 8),
+    )
+
+
+def test_fwhm_shift_invariant():
+    dt = 1e-15
+    spectrum = gaussian_spectrum(chirp=0.02)
+    # A linear spectral phase only delays the pulse; a sub-sample delay
+    # slightly changes where the linearly interpolated crossings fall
+    delay = np.exp(2j * np.pi * 0.3 * np.arange(len(spectrum)))
+    np.testing.assert_allclose(
+        get_fwhm_from_spectra(spectrum * delay, dt),
+        get_fwhm_from_spectra(spectrum, dt),
+        rtol=1e-4,
+    )
+
+
+def test_fwhm_undetermined_is_nan():
+    dt = 1e-15
+    zero = np.zeros(64, dtype=complex)
+    # A single frequency has a constant intensity: it never drops to half-max
+    flat = np.zeros(64, dtype=complex)
+    flat[10] = 1.0
+    spectra = np.stack([zero, flat, gaussian_spectrum(num_freqs=64, center=20.0)])
+    fwhm = get_fwhm_from_spectra(spectra, dt)
+    assert np.isnan(fwhm[0])
+    assert np.isnan(fwhm[1])
+    assert np.isfinite(fwhm[2])
+
+
+def test_roll_peaks_to():
+    rng = np.random.default_rng(0)
+    profiles = rng.uniform(size=(5, 32))
+    rolled = roll_peaks_to(profiles, 16)
+    np.testing.assert_array_equal(np.argmax(rolled, axis=1), 16)
+    for row, original in zip(rolled, profiles):
+        shift = 16 - np.argmax(original)
+        np.testing.assert_array_equal(row, np.roll(original, shift))
+
+
+def reference_interpolate(x, xp, fp):
+    return scipy.interpolate.interp1d(xp, fp, bounds_error=False, fill_value=0.0)(x)
+
+
+@pytest.mark.parametrize("order", ["ascending", "descending", "unsorted"])
+@pytest.mark.parametrize("dtype", [float, complex])
+def test_interpolate_zero_fill(order: str, dtype: type):
+    rng = np.random.default_rng(1)
+    xp = np.sort(rng.uniform(0.0, 10.0, 100))
+    fp = rng.normal(size=100)
+    if dtype is complex:
+        fp = fp + 1j * rng.normal(size=100)
+    if order == "descending":
+        xp, fp = xp[::-1], fp[::-1]
+    elif order == "unsorted":
+        perm = rng.permutation(len(xp))
+        xp, fp = xp[perm], fp[perm]
+
+    # Including points outside of xp, which are zero-filled
+    x = rng.uniform(-2.0, 12.0, 500)
+    result = interpolate_zero_fill(x, xp, fp)
+    np.testing.assert_allclose(result, reference_interpolate(x, xp, fp), atol=1e-12)
+    assert np.all(result[(x < xp.min()) | (x > xp.max())] == 0.0)
@@ -9,8 +9,6 @@ import numpy as np
 import ophyd
 import pypret
 import pypret.frequencies
-import scipy
-import scipy.interpolate
 from qtpy import QtCore, QtWidgets
 
 SOURCE_PATH = pathlib.Path(__file__).resolve().parent
@@ -18,6 +16,37 @@ SOURCE_PATH = pathlib.Path(__file__).resolve().parent
 logger = logging.getLogger(__name__)
 
 
+def interpolate_zero_fill(x: np.ndarray, xp: np.ndarray, fp: np.ndarray) -> np.ndarray:
+    """
+    Linearly interpolate ``fp(xp)`` at ``x``, with zeros outside of ``xp``.
+
+    Equivalent to ``scipy.interpolate.interp1d(xp, fp, bounds_error=False,
+    fill_value=0.0)(x)``, but without the setup cost of an interpolator
+    object.  ``xp`` may be in ascending or descending order.
+
+    Parameters
+    ----------
+    x : np.ndarray
+        The points at which to evaluate.
+    xp : np.ndarray
+        The sample points.
+    fp : np.ndarray
+        The (real or complex) sample values.
+
+    Returns
+    -------
+    np.ndarray
+    """
+    if len(xp) > 1 and xp[0] > xp[-1]:
+        xp = xp[::-1]
+        fp = fp[::-1]
+    if np.any(np.diff(xp) < 0):
+        order = np.argsort(xp, kind="stable")
+        xp = xp[order]
+        fp = fp[order]
+    return np.interp(x, xp, fp, left=0.0, right=0.0)
+
+
 def get_pulse_spectrum(
     wavelength: np.ndarray, spectrum: np.ndarray, pulse: pypret.Pulse
 ) -> np.ndarray:
@@ -27,14 +56,96 @@ def get_pulse_spectrum(
     # scale to intensity over frequency, convert to amplitude and normalize
     # spectrum = spectrum * wavelength * wavelength
     # spectrum = spectrum.copy()
-    spectrum[spectrum < 0.0] = 0.0
+    np.putmask(spectrum, spectrum < 0.0, 0.0)
     spectrum = np.sqrt(spectrum + 0.0j)
     spectrum /= spectrum.max()
     # calculate angular frequencies
     w = pypret.frequencies.convert(wavelength, "wl", "om")
-    return scipy.interpolate.interp1d(
-        w - pulse.w0, spectrum, bounds_error=False, fill_value=0.0
-    )(pulse.w)
+    return interpolate_zero_fill(pulse.w, w - pulse.w0, spectrum)
+
+
+def roll_peaks_to(profiles: np.ndarray, index: int) -> np.ndarray:
+    """Circularly shift each row of ``profiles`` so its maximum is at ``index``."""
+    num_samples = profiles.shape[-1]
+    shift = np.argmax(profiles, axis=1) - index
+    cols = (np.arange(num_samples)[np.newaxis, :] + shift[:, np.newaxis]) % num_samples
+    return np.take_along_axis(profiles, cols, axis=1)
+
+
+def get_fwhm_from_spectra(
+    spectra: np.ndarray,
+    dt: float,
+    oversampling: int = 8,
+    chunk_samples: int = 2**20,
+) -> np.ndarray:
+    """
+    Full-width half-max (FWHM) of the temporal intensity of each spectrum.
+
+    The temporal profiles are calculated with a batched FFT, zero-padded for
+    band-limited interpolation onto a time grid ``oversampling`` times finer
+    than ``dt``.  Half-max crossings are then linearly interpolated, as in
+    ``pypret.Pulse.fwhm``.  The FWHM does not depend on the absolute time or
+    carrier offsets, so these are not required.
+
+    Parameters
+    ----------
+    spectra : np.ndarray
+        Complex spectra on an evenly spaced frequency grid, one per row.
+    dt : float
+        The time step corresponding to the frequency grid.
+    oversampling : int, optional
+        The time-domain oversampling factor.
+    chunk_samples : int, optional
+        The approximate number of oversampled time samples to process at
+        once, which bounds the memory used for many or long spectra.  At
+        least one row is always processed at a time.
+
+    Returns
+    -------
+    np.ndarray
+        The FWHM for each spectrum, in the units of ``dt``.  NaN where it
+        could not be determined.
+    """
+    spectra = np.atleast_2d(spectra)
+    num_samples = spectra.shape[-1] * oversampling
+    rows_per_chunk = max(1, chunk_samples // num_samples)
+
+    fwhm = np.empty(len(spectra))
+    for start in range(0, len(spectra), rows_per_chunk):
+        stop = start + rows_per_chunk
+        fwhm[start:stop] = _get_fwhm_from_chunk(spectra[start:stop], oversampling)
+    return fwhm * (dt / oversampling)
+
+
+def _get_fwhm_from_chunk(spectra: np.ndarray, oversampling: int) -> np.ndarray:
+    """FWHM of each row of ``spectra``, in oversampled time steps."""
+    num_rows, num_freqs = spectra.shape
+    num_samples = num_freqs * oversampling
+    profiles = np.abs(np.fft.ifft(spectra, n=num_samples, axis=-1)) ** 2
+
+    # Circularly shift the peaks to the center so that no pulse wraps around
+    mid_idx = num_samples // 2
+    profiles = roll_peaks_to(profiles, mid_idx)
+
+    rows = np.arange(num_rows)
+    half_max = profiles[:, mid_idx] / 2.0
+    above = profiles >= half_max[:, np.newaxis]
+    # The outermost samples at or above half-max:
+    left = np.argmax(above, axis=1)
+    right = num_samples - 1 - np.argmax(above[:, ::-1], axis=1)
+    valid = (half_max > 0) & (left > 0) & (right < num_samples - 1)
+    left_outside = np.maximum(left - 1, 0)
+    right_outside = np.minimum(right + 1, num_samples - 1)
+
+    def crossing(idx0: np.ndarray, idx1: np.ndarray) -> np.ndarray:
+        """Fractional sample index of the half-max crossing in [idx0, idx1]."""
+        y0 = profiles[rows, idx0]
+        y1 = profiles[rows, idx1]
+        with np.errstate(divide="ignore", invalid="ignore"):
+            return idx0 + (half_max - y0) / (y1 - y0) * (idx1 - idx0)
+
+    width = crossing(right, right_outside) - crossing(left_outside, left)
+    return np.where(valid, width, np.nan)
 
 
 def preprocess(
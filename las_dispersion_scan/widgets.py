@@ -196,7 +196,7 @@ class SpectrumPlotWidget(PlotWidget):
 
         # _, ax = plt.subplots()
         # ax = cast(plt.Axes, ax)
-        # profile = main.result.result_profile.transpose()[closest_pos_idx]
+        # profile = main.result.result_profile[closest_pos_idx]
         # ax.plot(
         #     main.result.pulse.t * 1e15, profile / np.max(profile), label=self.plot_type
         # )
@@ -3,6 +3,7 @@ from os import path
 
 import versioneer
 from setuptools import find_packages, setup
+from setuptools.command.build_py import build_py
 
 min_version = (3, 9)
 
@@ -40,10 +41,43 @@ if git_requirements:
     print()
 
 
+# Stylesheets (in las_dispersion_scan/ui) to be merged at build time, in order.
+# The GUI falls back to loading these individually when the generated module
+# is absent, as in a development checkout.
+merged_stylesheets = ['stylesheet.qss', 'pydm.qss']
+merged_stylesheet_module = '_stylesheet_data.py'
+
+
+class build_py_with_merged_stylesheet(build_py):
+    """Merge the packaged stylesheets into a Python module at build time."""
+
+    def run(self):
+        super().run()
+        if getattr(self, 'editable_mode', False):
+            return
+
+        stylesheets = []
+        for name in merged_stylesheets:
+            stylesheet_path = path.join(here, 'las_dispersion_scan', 'ui', name)
+            with open(stylesheet_path, 'rb') as fp:
+                stylesheets.append(fp.read())
+
+        stylesheet = b'\n\n'.join(stylesheets).decode('utf-8')
+        target = path.join(
+            self.build_lib, 'las_dispersion_scan', 'ui', merged_stylesheet_module
+        )
+        with open(target, 'wt', encoding='utf-8') as fp:
+            fp.write('# Generated by setup.py from: ' + ', '.join(merged_stylesheets))
+            fp.write('\n')
+            fp.write(f'STYLESHEET = {stylesheet!r}\n')
+
+
 setup(
     name='las_dispersion_scan',
     version=versioneer.get_version(),
-    cmdclass=versioneer.get_cmdclass(),
+    cmdclass=versioneer.get_cmdclass(
+        {'build_py': build_py_with_merged_stylesheet}
+    ),
     license='BSD',
     author='SLAC National Accelerator Laboratory',
     packages=find_packages(exclude=['docs', 'tests']),